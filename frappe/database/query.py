@@ -1,10 +1,10 @@
 import re
-from functools import lru_cache
+from collections import defaultdict
+from functools import cached_property, lru_cache, partial
 from typing import TYPE_CHECKING, Any
 
-import sqlparse
 from pypika.queries import QueryBuilder, Table
-from pypika.terms import AggregateFunction, Term
+from pypika.terms import AggregateFunction, Bracket, Not, Term
 
 import frappe
 from frappe import _
@@ -13,14 +13,23 @@ from frappe.database.utils import DefaultOrderBy, FilterValue, convert_to_value,
 from frappe.model import get_permitted_fields
 from frappe.query_builder import Criterion, Field, Order, functions
 from frappe.query_builder.utils import PseudoColumnMapper
-from frappe.utils.data import MARIADB_SPECIFIC_COMMENT
+from frappe.utils.caching import request_cache
 
 if TYPE_CHECKING:
+	from frappe.model.meta import Meta
 	from frappe.query_builder import DocType
 
-TAB_PATTERN = re.compile("^tab")
-WORDS_PATTERN = re.compile(r"\w+")
-COMMA_PATTERN = re.compile(r",\s*(?![^()]*\))")
+TAB_WORDS_PATTERN = re.compile(r"\btab\w*")
+SIMPLE_FIELD_PATTERN = re.compile(r"\w+")
+ALIAS_PATTERN = re.compile(r"\s+as\s+", flags=re.IGNORECASE)
+ORDER_DIRECTIONS = frozenset(("asc", "desc"))
+LOGICAL_OPERATORS = frozenset(("and", "or"))
+
+# isinstance() type tuples, `list | tuple` would build a new union object on every call
+LIST_OR_TUPLE = (list, tuple)
+LIST_TUPLE_OR_SET = (list, tuple, set)
+CRITERION_OR_FIELD = (Criterion, Field)
+NUMBER_TYPES = (int, float)
 
 # less restrictive version of frappe.core.doctype.doctype.doctype.START_WITH_LETTERS_PATTERN
 # to allow table names like __Auth
@@ -37,6 +46,96 @@ ALLOWED_FIELD_PATTERN = re.compile(r"^(?:(`[\w\s-]+`|\w+)\.)?(`\w+`|\w+)(?:\s+as
 # Group 4: Field name (e.g., `field` or field)
 FIELD_PARSE_REGEX = re.compile(r"^(?:([`\"]?)(tab[\w\s-]+)\1\.)?([`\"]?)(\w+)\3$")
 
+# Regex to match `tabDoc`.`field`, "tabDoc"."field", tabDoc.field
+# Group 1: Doctype name (without 'tab')
+# Group 2: Optional quote for fieldname
+# Group 3: Fieldname
+# Ensures quotes are consistent or absent on fieldname using backreference \2
+# Allow spaces in doctype name (Group 1) and field name (Group 3)
+TAB_NOTATION_PATTERN = re.compile(r'[`"]?tab([\w\s]+)[`"]?\.([`"]?)([\w\s]+)\2$')
+
+# Content rejected in string literals passed to SQL functions, all alternatives are matched in a single scan
+DANGEROUS_LITERAL_PATTERN = re.compile(
+	"|".join(
+		(
+			# SQL injection keywords
+			r"\b(?:union|select|insert|update|delete|drop|create|alter|exec|execute)\b",
+			# Comment patterns
+			r"--",
+			r"/\*",
+			r"\*/",
+			# Semicolon (statement terminator)
+			r";",
+			# Backslash escape sequences that could be dangerous
+			r"\\x[0-9a-fA-F]{2}",  # Hex escape sequences
+			r"\\[0-7]{1,3}",  # Octal escape sequences
+		)
+	),
+	flags=re.IGNORECASE,
+)
+
+# SQL keywords that can't be used as aliases of SQL function fields
+ALIAS_RESERVED_KEYWORDS = frozenset(
+	(
+		"select",
+		"from",
+		"where",
+		"join",
+		"inner",
+		"left",
+		"right",
+		"outer",
+		"union",
+		"group",
+		"order",
+		"by",
+		"having",
+		"limit",
+		"offset",
+		"insert",
+		"update",
+		"delete",
+		"create",
+		"drop",
+		"alter",
+		"table",
+		"index",
+		"view",
+		"database",
+		"schema",
+		"grant",
+		"revoke",
+		"commit",
+		"rollback",
+		"transaction",
+		"begin",
+		"end",
+		"if",
+		"else",
+		"case",
+		"when",
+		"then",
+		"null",
+		"not",
+		"and",
+		"or",
+		"in",
+		"exists",
+		"between",
+		"like",
+		"is",
+		"as",
+		"on",
+		"using",
+		"distinct",
+		"all",
+		"any",
+		"some",
+		"true",
+		"false",
+	)
+)
+
 # Direct mapping from uppercase function names to pypika function classes
 FUNCTION_MAPPING = {
 	"COUNT": functions.Count,
@@ -87,6 +186,9 @@ class Engine:
 		self.user = user or frappe.session.user
 		self.parent_doctype = parent_doctype
 		self.apply_permissions = not ignore_permissions
+		self._meta_cache = {}
+		self._permission_type_cache = {}
+		self._permitted_fields_cache = {}
 
 		if isinstance(table, Table):
 			self.table = table
@@ -94,7 +196,7 @@ class Engine:
 		else:
 			self.doctype = table
 			self.validate_doctype()
-			self.table = qb.DocType(table)
+			self.table = _get_doctype_table(table)
 
 		if self.apply_permissions:
 			self.check_read_permission()
@@ -139,8 +241,15 @@ class Engine:
 		self.query.immutable = True
 		return self.query
 
+	def _get_meta(self, doctype: str) -> "Meta":
+		"""Return meta of the doctype, cached for the duration of this query build."""
+		meta = self._meta_cache.get(doctype)
+		if meta is None:
+			meta = self._meta_cache[doctype] = frappe.get_meta(doctype)
+		return meta
+
 	def validate_doctype(self):
-		if not TABLE_NAME_PATTERN.match(self.doctype):
+		if not _is_valid_table_name(self.doctype):
 			frappe.throw(_("Invalid DocType: {0}").format(self.doctype))
 
 	def apply_fields(self, fields):
@@ -178,7 +287,7 @@ class Engine:
 			self.apply_dict_filters(filters)
 			return
 
-		if isinstance(filters, list | tuple):
+		if isinstance(filters, LIST_OR_TUPLE):
 			if not filters:
 				return
 
@@ -193,7 +302,7 @@ class Engine:
 			is_single_group = False
 
 			# Check for single grouped condition [[cond_a, op, cond_b]]
-			if len(filters) == 1 and isinstance(filters[0], list | tuple):
+			if len(filters) == 1 and isinstance(filters[0], LIST_OR_TUPLE):
 				inner_list = filters[0]
 				# Ensure inner list also looks like a nested structure
 				# Check if the operator is a string, validation happens inside _parse_nested_filters
@@ -232,10 +341,12 @@ class Engine:
 
 			else:  # Not a nested structure, assume it's a list of simple filters (implicitly ANDed)
 				for filter_item in filters:
-					if isinstance(filter_item, list | tuple):
+					if isinstance(filter_item, LIST_OR_TUPLE):
 						self.apply_list_filters(filter_item)  # Handles simple [field, op, value] lists
-					elif isinstance(filter_item, dict | Criterion):
-						self.apply_filters(filter_item)  # Recursive call for dict/criterion
+					elif isinstance(filter_item, dict):
+						self.apply_dict_filters(filter_item)
+					elif isinstance(filter_item, Criterion):
+						self.query = self.query.where(filter_item)
 					else:
 						# Disallow single values (strings, numbers, etc.) directly in the list
 						# unless it's the name IN (...) case handled above.
@@ -263,7 +374,7 @@ class Engine:
 	def apply_dict_filters(self, filters: dict[str, FilterValue | list]):
 		for field, value in filters.items():
 			operator = "="
-			if isinstance(value, list | tuple):
+			if isinstance(value, LIST_OR_TUPLE):
 				operator, value = value
 
 			self._apply_filter(field, value, operator)
@@ -292,7 +403,7 @@ class Engine:
 		_value = convert_to_value(value)
 		_operator = operator
 
-		if not _value and isinstance(_value, list | tuple | set):
+		if not _value and isinstance(_value, LIST_TUPLE_OR_SET):
 			_value = ("",)
 
 		if _operator in NESTED_SET_OPERATORS:
@@ -304,10 +415,8 @@ class Engine:
 			# We need the original string ('link.target') or the fieldname from the main doctype.
 			original_field_name = field if isinstance(field, str) else _field.name
 			# Check if the original field name exists in the *main* doctype meta
-			main_meta = frappe.get_meta(self.doctype)
-			if main_meta.has_field(original_field_name):
-				_df = main_meta.get_field(original_field_name)
-				ref_doctype = _df.options if _df else self.doctype
+			if _df := self._get_meta(self.doctype).get_field(original_field_name):
+				ref_doctype = _df.options
 			else:
 				# If not in main doctype, assume it's a standard field like 'name' or refers to the main doctype itself
 				# This part might need refinement if nested set operators are used with dynamic fields.
@@ -321,7 +430,8 @@ class Engine:
 			)
 			return operator_fn(_field, nodes or ("",))
 
-		operator_fn = OPERATOR_MAP[_operator.casefold()]
+		# OPERATOR_MAP keys are already casefolded, only fold the operator if it isn't found as is
+		operator_fn = OPERATOR_MAP.get(_operator) or OPERATOR_MAP[_operator.casefold()]
 		if _value is None and isinstance(_field, Field):
 			return _field.isnull()
 		else:
@@ -329,14 +439,14 @@ class Engine:
 
 	def _parse_nested_filters(self, nested_list: list | tuple) -> "Criterion | None":
 		"""Parses a nested filter list like [cond1, 'and', cond2, 'or', cond3, ...] into a pypika Criterion."""
-		if not isinstance(nested_list, list | tuple):
+		if not isinstance(nested_list, LIST_OR_TUPLE):
 			frappe.throw(_("Nested filters must be provided as a list or tuple."))
 
 		if not nested_list:
 			return None
 
 		# First item must be a condition (list/tuple)
-		if not isinstance(nested_list[0], list | tuple):
+		if not isinstance(nested_list[0], LIST_OR_TUPLE):
 			frappe.throw(
 				_("Invalid start for filter condition: {0}. Expected a list or tuple.").format(nested_list[0])
 			)
@@ -347,7 +457,10 @@ class Engine:
 		while idx < len(nested_list):
 			# Expect an operator ('and' or 'or')
 			operator_str = nested_list[idx]
-			if not isinstance(operator_str, str) or operator_str.lower() not in ("and", "or"):
+			if (
+				not isinstance(operator_str, str)
+				or (logical_operator := operator_str.lower()) not in LOGICAL_OPERATORS
+			):
 				frappe.throw(
 					_("Expected 'and' or 'or' operator, found: {0}").format(operator_str),
 					frappe.ValidationError,
@@ -359,16 +472,16 @@ class Engine:
 
 			# Expect a condition (list/tuple)
 			next_condition = nested_list[idx]
-			if not isinstance(next_condition, list | tuple):
+			if not isinstance(next_condition, LIST_OR_TUPLE):
 				frappe.throw(
 					_("Invalid filter condition: {0}. Expected a list or tuple.").format(next_condition)
 				)
 
 			next_criterion = self._condition_to_criterion(next_condition)
 
-			if operator_str.lower() == "and":
+			if logical_operator == "and":
 				current_criterion = current_criterion & next_criterion
-			elif operator_str.lower() == "or":
+			elif logical_operator == "or":
 				current_criterion = current_criterion | next_criterion
 
 			idx += 1
@@ -377,14 +490,14 @@ class Engine:
 
 	def _condition_to_criterion(self, condition: list | tuple) -> "Criterion":
 		"""Converts a single condition (simple filter list or nested list) into a pypika Criterion."""
-		if not isinstance(condition, list | tuple):
+		if not isinstance(condition, LIST_OR_TUPLE):
 			frappe.throw(_("Invalid condition type in nested filters: {0}").format(type(condition)))
 
 		# Check if it's a nested condition list [cond1, op, cond2, ...]
 		is_nested = False
 		# Broaden check here as well: length >= 3 and second element is string
 		if len(condition) >= 3 and isinstance(condition[1], str):
-			if isinstance(condition[0], list | tuple):  # First element must also be a condition
+			if isinstance(condition[0], LIST_OR_TUPLE):  # First element must also be a condition
 				is_nested = True
 
 		if is_nested:
@@ -455,7 +568,7 @@ class Engine:
 				)
 		else:
 			# No '.' and no '`'. Check if it's a simple field name (alphanumeric + underscore).
-			if not re.fullmatch(r"\w+", field):
+			if not _is_simple_field_name(field):
 				frappe.throw(
 					_(
 						"Invalid characters in fieldname: {0}. Only letters, numbers, and underscores are allowed."
@@ -472,7 +585,7 @@ class Engine:
 			# assume it's a child table and add the join using ChildTableField logic.
 			if doctype and doctype != self.doctype:
 				# Check if doctype is a valid child table of self.doctype
-				parent_meta = frappe.get_meta(self.doctype)
+				parent_meta = self._get_meta(self.doctype)
 				# Find the parent fieldname for this child doctype
 				parent_fieldname = None
 				for df in parent_meta.get_table_fields():
@@ -508,7 +621,7 @@ class Engine:
 				# Field belongs to the main doctype or doctype wasn't specified differently
 				self._check_field_permission(target_doctype, target_fieldname, parent_doctype_for_perm)
 				# Convert string field name to pypika Field object for the specified/current doctype
-				return frappe.qb.DocType(target_doctype)[target_fieldname]
+				return _get_doctype_table(target_doctype)[target_fieldname]
 
 	def _check_field_permission(self, doctype: str, fieldname: str, parent_doctype: str | None = None):
 		"""Check if the user has permission to access the given field"""
@@ -516,13 +629,7 @@ class Engine:
 			return
 
 		permission_type = self.get_permission_type(doctype)
-		permitted_fields = get_permitted_fields(
-			doctype=doctype,
-			parenttype=parent_doctype,
-			permission_type=permission_type,
-			ignore_virtual=True,
-			user=self.user,
-		)
+		permitted_fields = self._get_permitted_fields(doctype, parent_doctype, permission_type)
 
 		if fieldname not in permitted_fields:
 			frappe.throw(
@@ -551,29 +658,25 @@ class Engine:
 
 		alias = None
 		field_part = field
-		if " as " in field.lower():  # Case-insensitive check for ' as '
-			# Find the last occurrence of ' as ' to handle potential aliases named 'as'
-			parts = re.split(r"\s+as\s+", field, flags=re.IGNORECASE)
-			if len(parts) > 1:
-				field_part = parts[0].strip()
-				alias = parts[1].strip().strip('`"')  # Remove potential quotes from alias
+		# Case-insensitive search for ' as ', an alias always comes with a space
+		if " " in field and (alias_match := ALIAS_PATTERN.search(field)):
+			field_part = field[: alias_match.start()].strip()
+			alias = field[alias_match.end() :].strip().strip('`"')  # Remove potential quotes from alias
 
-		match = FIELD_PARSE_REGEX.match(field_part)
+		parsed = _parse_field_name(field_part)
 
-		if not match:
+		if not parsed:
 			frappe.throw(_("Could not parse field: {0}").format(field))
 
-		# Groups: 1: table_quote, 2: table_name_with_tab, 3: field_quote, 4: field_name
-		groups = match.groups()
-		table_name = groups[1]  # This will be None if no table part (e.g., just 'field')
-		field_name = groups[3]  # This will be the field name (e.g., 'field')
+		# table_name will be None if no table part (e.g., just 'field')
+		table_name, field_name = parsed
 
 		if table_name:
 			# Table name specified (e.g., `tabX`.`y` or tabX.y or `tabX Y`.`y`)
 			# Ensure the extracted table name is valid before creating DocType object
-			if not TABLE_NAME_PATTERN.match(table_name.lstrip("tab")):
+			if not _is_valid_table_name(table_name.lstrip("tab")):
 				frappe.throw(_("Invalid characters in table name: {0}").format(table_name))
-			table_obj = frappe.qb.DocType(table_name)
+			table_obj = _get_doctype_table(table_name)
 			pypika_field = table_obj[field_name]
 		else:
 			# Simple field name (e.g., `y` or y) - use the main table
@@ -594,41 +697,34 @@ class Engine:
 		if isinstance(fields, Term):
 			return [fields]
 
-		initial_field_list = []
 		if isinstance(fields, str):
-			# Split comma-separated fields passed as a single string
-			initial_field_list.extend(f.strip() for f in COMMA_PATTERN.split(fields) if f.strip())
-		elif isinstance(fields, list | tuple):
-			for item in fields:
-				if isinstance(item, str) and "," in item:
-					# Split comma-separated strings within the list
-					initial_field_list.extend(f.strip() for f in COMMA_PATTERN.split(item) if f.strip())
-				else:
-					# Add non-comma-separated items directly
-					initial_field_list.append(item)
+			# Split and sanitize comma-separated fields passed as a single string
+			initial_field_list = _sanitize_fields(fields)
+		elif isinstance(fields, LIST_OR_TUPLE):
+			if all(isinstance(item, str) for item in fields):
+				# Plain string lists are split and sanitized as a whole, this is the common shape
+				initial_field_list = _sanitize_fields(tuple(fields))
+			else:
+				initial_field_list = []
+				for item in fields:
+					if isinstance(item, str):
+						# Sanitize and split potentially comma-separated strings within the list
+						initial_field_list.extend(_sanitize_fields((item,)))
+					else:
+						# Add non-string items (like dict for child query, or pre-parsed Field/Function) directly
+						initial_field_list.append(item)
 
 		else:
 			frappe.throw(_("Fields must be a string, list, tuple, pypika Field, or pypika Function"))
 
 		_fields = []
-		# Iterate through the list where each item could be a single field, criterion, or a comma-separated string
+		# Iterate through the list where each item could be a sanitized field string, criterion, or dict
 		for item in initial_field_list:
-			if isinstance(item, str):
-				# Sanitize and split potentially comma-separated strings within the list
-				sanitized_item = _sanitize_field(item.strip(), self.is_mariadb).strip()
-				if sanitized_item:
-					parsed = self._parse_single_field_item(sanitized_item)
-					if isinstance(parsed, list):  # Result from parsing a child query dict
-						_fields.extend(parsed)
-					elif parsed:
-						_fields.append(parsed)
-			else:
-				# Handle non-string items (like dict for child query, or pre-parsed Field/Function)
-				parsed = self._parse_single_field_item(item)
-				if isinstance(parsed, list):
-					_fields.extend(parsed)
-				elif parsed:
-					_fields.append(parsed)
+			parsed = self._parse_single_field_item(item)
+			if isinstance(parsed, list):  # Result from parsing a child query dict
+				_fields.extend(parsed)
+			elif parsed:
+				_fields.append(parsed)
 
 		return _fields
 
@@ -636,7 +732,7 @@ class Engine:
 		self, field: str | Criterion | dict | Field
 	) -> "list | Criterion | Field | DynamicTableField | ChildQuery | None":
 		"""Parses a single item from the fields list/tuple. Assumes comma-separated strings have already been split."""
-		if isinstance(field, Criterion | Field):
+		if isinstance(field, CRITERION_OR_FIELD):
 			return field
 		elif isinstance(field, dict):
 			# Check if it's a SQL function dictionary
@@ -655,7 +751,7 @@ class Engine:
 						)
 
 					# Ensure child_fields_list is a list or tuple
-					if not isinstance(child_fields_list, list | tuple):
+					if not isinstance(child_fields_list, LIST_OR_TUPLE):
 						frappe.throw(
 							_("Child query fields for '{0}' must be a list or tuple.").format(child_field)
 						)
@@ -667,8 +763,8 @@ class Engine:
 		if not isinstance(field, str):
 			frappe.throw(_("Invalid field type: {0}").format(type(field)))
 
-		# Try parsing as dynamic field (link/child table access)
-		if parsed := DynamicTableField.parse(field, self.doctype):
+		# Try parsing as dynamic field (link/child table access), only possible with a dot
+		if "." in field and (parsed := DynamicTableField.parse(field, self.doctype)):
 			return parsed
 		# Otherwise, parse as a standard field (simple, quoted, table-qualified, with/without alias)
 		else:
@@ -710,8 +806,9 @@ class Engine:
 			)
 
 		# Try parsing as dynamic field (link_field.field or child_table.field)
-		dynamic_field = DynamicTableField.parse(field_name, self.doctype, allow_tab_notation=False)
-		if dynamic_field:
+		if "." in field_name and (
+			dynamic_field := DynamicTableField.parse(field_name, self.doctype, allow_tab_notation=False)
+		):
 			# Check permissions for dynamic field
 			if self.apply_permissions:
 				if isinstance(dynamic_field, ChildTableField):
@@ -729,7 +826,7 @@ class Engine:
 			return dynamic_field.field
 		else:
 			# Validate as simple field name (alphanumeric + underscore only)
-			if not re.fullmatch(r"\w+", field_name):
+			if not _is_simple_field_name(field_name):
 				frappe.throw(
 					_(
 						"Invalid field format in {0}: {1}. Use 'field', 'link_field.field', or 'child_table.field'."
@@ -750,12 +847,7 @@ class Engine:
 			frappe.throw(_("Group By must be a string"), TypeError)
 
 		parsed_fields = []
-		parts = COMMA_PATTERN.split(group_by)
-		for part in parts:
-			field_name = part.strip()
-			if not field_name:
-				continue
-
+		for field_name in _split_fields(group_by):
 			parsed_field = self._validate_and_parse_field_for_clause(field_name, "Group By")
 			parsed_fields.append(parsed_field)
 
@@ -766,12 +858,13 @@ class Engine:
 		if not isinstance(order_by, str):
 			frappe.throw(_("Order By must be a string"), TypeError)
 
-		valid_directions = {"asc", "desc"}
 		parsed_order_fields = []
 
-		for declaration in order_by.split(","):
-			if _order_by := declaration.strip():
-				parts = _order_by.split()
+		# most queries order by a single field, e.g. "creation desc"
+		declarations = order_by.split(",") if "," in order_by else (order_by,)
+		for declaration in declarations:
+			# split() without arguments also drops surrounding whitespace, no strip() needed
+			if parts := declaration.split():
 				field_name = parts[0]
 				direction = None
 				if len(parts) > 1:
@@ -782,7 +875,7 @@ class Engine:
 				parsed_field = self._validate_and_parse_field_for_clause(field_name, "Order By")
 				parsed_order_fields.append((parsed_field, order_direction))
 
-				if direction and direction not in valid_directions:
+				if direction and direction not in ORDER_DIRECTIONS:
 					frappe.throw(
 						_("Invalid direction in Order By: {0}. Must be 'ASC' or 'DESC'.").format(parts[1]),
 						ValueError,
@@ -806,26 +899,33 @@ class Engine:
 				_("Insufficient Permission for {0}").format(frappe.bold(self.doctype)), frappe.PermissionError
 			)
 
+	def _get_permitted_fields(
+		self,
+		doctype: str,
+		parenttype: str | None = None,
+		permission_type: str | None = None,
+	) -> set[str]:
+		"""Return fieldnames permitted to the query's user as a set, cached for the duration of this query build."""
+		cache_key = (doctype, parenttype, permission_type)
+		permitted_fields = self._permitted_fields_cache.get(cache_key)
+		if permitted_fields is None:
+			permitted_fields = set(
+				get_permitted_fields(
+					doctype=doctype,
+					parenttype=parenttype,
+					permission_type=permission_type,
+					ignore_virtual=True,
+					user=self.user,
+				)
+			)
+			self._permitted_fields_cache[cache_key] = permitted_fields
+		return permitted_fields
+
 	def apply_field_permissions(self):
 		"""Filter the list of fields based on permlevel."""
 		allowed_fields = []
 		parent_permission_type = self.get_permission_type(self.doctype)
-		permitted_fields_cache = {}
-
-		def get_cached_permitted_fields(doctype, parenttype, permission_type):
-			cache_key = (doctype, parenttype, permission_type)
-			if cache_key not in permitted_fields_cache:
-				permitted_fields_cache[cache_key] = set(
-					get_permitted_fields(
-						doctype=doctype,
-						parenttype=parenttype,
-						permission_type=permission_type,
-						ignore_virtual=True,
-					)
-				)
-			return permitted_fields_cache[cache_key]
-
-		permitted_fields_set = get_cached_permitted_fields(
+		permitted_fields_set = self._get_permitted_fields(
 			self.doctype, self.parent_doctype, parent_permission_type
 		)
 
@@ -835,8 +935,7 @@ class Engine:
 					# Skip child table fields if parent permission is only 'select'
 					continue
 
-				# Cache permitted fields for child doctypes if accessed multiple times
-				permitted_child_fields_set = get_cached_permitted_fields(
+				permitted_child_fields_set = self._get_permitted_fields(
 					field.doctype, field.parent_doctype, self.get_permission_type(field.doctype)
 				)
 				# Check permission for the specific field in the child table
@@ -853,7 +952,7 @@ class Engine:
 
 					if has_target_perm:
 						# Finally, check if the specific field *in the target doctype* is permitted
-						permitted_target_fields_set = get_cached_permitted_fields(
+						permitted_target_fields_set = self._get_permitted_fields(
 							target_doctype, None, self.get_permission_type(target_doctype)
 						)
 						if field.fieldname in permitted_target_fields_set:
@@ -863,8 +962,7 @@ class Engine:
 					# Skip child queries if parent permission is only 'select'
 					continue
 
-				# Cache permitted fields for the child doctype of the query
-				permitted_child_fields_set = get_cached_permitted_fields(
+				permitted_child_fields_set = self._get_permitted_fields(
 					field.doctype, field.parent_doctype, self.get_permission_type(field.doctype)
 				)
 				# Filter the fields *within* the ChildQuery object based on permissions
@@ -940,7 +1038,7 @@ class Engine:
 		return conditions, fetch_shared_docs
 
 	def get_doctype_link_fields(self):
-		meta = frappe.get_meta(self.doctype)
+		meta = self._get_meta(self.doctype)
 		# append current doctype with fieldname as 'name' as first link field
 		doctype_link_fields = [{"options": self.doctype, "fieldname": "name"}]
 		# append other link fields
@@ -978,7 +1076,13 @@ class Engine:
 				self.query = self.query.where(shared_condition)
 		elif conditions:
 			# AND all permission conditions
-			self.query = self.query.where(Criterion.all(conditions))
+			if any(isinstance(condition, RawCriterion) for condition in conditions):
+				# raw SQL conditions are only bracketed when combined with each other
+				self.query = self.query.where(Criterion.all(conditions))
+			else:
+				# successive where() calls AND into the same clause without building an extra tree
+				for condition in conditions:
+					self.query = self.query.where(condition)
 
 	def get_permission_query_conditions(self):
 		"""Add permission query conditions from hooks and server scripts"""
@@ -1002,9 +1106,11 @@ class Engine:
 
 	def get_permission_type(self, doctype) -> str:
 		"""Get permission type (select/read) based on user permissions"""
-		if frappe.only_has_select_perm(doctype, user=self.user):
-			return "select"
-		return "read"
+		permission_type = self._permission_type_cache.get(doctype)
+		if permission_type is None:
+			permission_type = "select" if frappe.only_has_select_perm(doctype, user=self.user) else "read"
+			self._permission_type_cache[doctype] = permission_type
+		return permission_type
 
 	def requires_owner_constraint(self, role_permissions):
 		"""Return True if "select" or "read" isn't available without being creator."""
@@ -1035,26 +1141,23 @@ class Permission:
 		if isinstance(doctype, str):
 			doctype = [doctype]
 
-		for dt in doctype:
-			dt = TAB_PATTERN.sub("", dt)
+		user = kwargs.get("user")
+		parent_doctype = kwargs.get("parent_doctype")
+
+		# a table shows up once per column reference, check each of them only once
+		for dt in dict.fromkeys(doctype):
+			# get_tables_from_query only returns names starting with "tab"
+			dt = dt[3:]
 			if not frappe.has_permission(
-				dt,
-				"select",
-				user=kwargs.get("user"),
-				parent_doctype=kwargs.get("parent_doctype"),
-			) and not frappe.has_permission(
-				dt,
-				"read",
-				user=kwargs.get("user"),
-				parent_doctype=kwargs.get("parent_doctype"),
-			):
+				dt, "select", user=user, parent_doctype=parent_doctype
+			) and not frappe.has_permission(dt, "read", user=user, parent_doctype=parent_doctype):
 				frappe.throw(
 					_("Insufficient Permission for {0}").format(frappe.bold(dt)), frappe.PermissionError
 				)
 
 	@staticmethod
 	def get_tables_from_query(query: str):
-		return [table for table in WORDS_PATTERN.findall(query) if table.startswith("tab")]
+		return TAB_WORDS_PATTERN.findall(query)
 
 
 class DynamicTableField:
@@ -1071,6 +1174,10 @@ class DynamicTableField:
 		self.parent_doctype = parent_doctype
 
 	def __str__(self) -> str:
+		return self._sql
+
+	@cached_property
+	def _sql(self) -> str:
 		table_name = f"`tab{self.doctype}`"
 		fieldname = f"`{self.fieldname}`"
 		if frappe.db.db_type == "postgres":
@@ -1084,8 +1191,8 @@ class DynamicTableField:
 		if "." in field:
 			alias = None
 			# Handle 'as' alias, case-insensitive, taking the last occurrence
-			if " as " in field.lower():
-				parts = re.split(r"\s+as\s+", field, flags=re.IGNORECASE)
+			if " " in field:
+				parts = ALIAS_PATTERN.split(field)
 				if len(parts) > 1:
 					field_part = parts[0].strip()
 					alias = parts[-1].strip().strip('`"')  # Get last part as alias
@@ -1093,18 +1200,11 @@ class DynamicTableField:
 
 			child_match = None
 			if allow_tab_notation:
-				# Regex to match `tabDoc`.`field`, "tabDoc"."field", tabDoc.field
-				# Group 1: Doctype name (without 'tab')
-				# Group 2: Optional quote for fieldname
-				# Group 3: Fieldname
-				# Ensures quotes are consistent or absent on fieldname using backreference \2
-				# Uses re.match to ensure the pattern matches the *entire* field string
-				# Allow spaces in doctype name (Group 1) and field name (Group 3)
-				child_match = re.match(r'[`"]?tab([\w\s]+)[`"]?\.([`"]?)([\w\s]+)\2$', field)
+				# Match `tabDoc`.`field`, "tabDoc"."field", tabDoc.field
+				child_match = _parse_tab_notation(field)
 
 			if child_match:
-				child_doctype_name = child_match.group(1)
-				child_field = child_match.group(3)
+				child_doctype_name, child_field = child_match
 
 				if child_doctype_name == doctype:
 					# Referencing a field in the main doctype using `tabDoctype.field` notation.
@@ -1177,16 +1277,15 @@ class ChildTableField(DynamicTableField):
 		self.alias = alias
 		self.parent_doctype = parent_doctype
 		self.parent_fieldname = parent_fieldname
-		self.table = frappe.qb.DocType(self.doctype)
+		self.table = _get_doctype_table(self.doctype)
 		self.field = self.table[self.fieldname]
 
 	def apply_select(self, query: QueryBuilder) -> QueryBuilder:
-		table = frappe.qb.DocType(self.doctype)
 		query = self.apply_join(query)
-		return query.select(getattr(table, self.fieldname).as_(self.alias or None))
+		return query.select(getattr(self.table, self.fieldname).as_(self.alias or None))
 
 	def apply_join(self, query: QueryBuilder) -> QueryBuilder:
-		main_table = frappe.qb.DocType(self.parent_doctype)
+		main_table = _get_doctype_table(self.parent_doctype)
 		if not query.is_joined(self.table):
 			join_conditions = (self.table.parent == main_table.name) & (
 				self.table.parenttype == self.parent_doctype
@@ -1208,84 +1307,249 @@ class LinkTableField(DynamicTableField):
 	) -> None:
 		super().__init__(doctype, fieldname, parent_doctype, alias=alias)
 		self.link_fieldname = link_fieldname
-		self.table = frappe.qb.DocType(self.doctype)
+		self.table = _get_doctype_table(self.doctype)
 		self.field = self.table[self.fieldname]
 
 	def apply_select(self, query: QueryBuilder) -> QueryBuilder:
-		table = frappe.qb.DocType(self.doctype)
 		query = self.apply_join(query)
-		return query.select(getattr(table, self.fieldname).as_(self.alias or None))
+		return query.select(getattr(self.table, self.fieldname).as_(self.alias or None))
 
 	def apply_join(self, query: QueryBuilder) -> QueryBuilder:
-		table = frappe.qb.DocType(self.doctype)
-		main_table = frappe.qb.DocType(self.parent_doctype)
+		main_table = _get_doctype_table(self.parent_doctype)
+		table = self.table
+		if self.doctype == self.parent_doctype:
+			# pypika aliases a self-joined table in place, don't do that to the shared instance
+			table = frappe.qb.DocType(self.doctype)
 		if not query.is_joined(table):
 			query = query.left_join(table).on(table.name == getattr(main_table, self.link_fieldname))
 		return query
 
 
+@request_cache
+def _get_child_table_doctype(parent_doctype: str, fieldname: str) -> str | None:
+	"""Return the child DocType of `fieldname` in `parent_doctype` if it is a table field."""
+	field = frappe.get_meta(parent_doctype).get_field(fieldname)
+	if field.fieldtype in frappe.model.table_fields:
+		return field.options
+
+
 class ChildQuery:
+	__slots__ = ("_base_filters", "_fields", "_query_fields", "doctype", "fieldname", "parent_doctype")
+
 	def __init__(
 		self,
 		fieldname: str,
 		fields: list,
 		parent_doctype: str,
 	) -> None:
-		field = frappe.get_meta(parent_doctype).get_field(fieldname)
-		if field.fieldtype not in frappe.model.table_fields:
+		child_doctype = _get_child_table_doctype(parent_doctype, fieldname)
+		if not child_doctype:
 			return
 		self.fieldname = fieldname
 		self.fields = fields
 		self.parent_doctype = parent_doctype
-		self.doctype = field.options
+		self.doctype = child_doctype
+		self._base_filters = {"parenttype": parent_doctype, "parentfield": fieldname}
+
+	@property
+	def fields(self) -> list:
+		return self._fields
+
+	@fields.setter
+	def fields(self, fields: list) -> None:
+		# fields are narrowed down by permission checks after init, keep the selected columns in sync
+		self._fields = fields
+		self._query_fields = (*fields, "parent", "parentfield")
 
 	def get_query(self, parent_names=None) -> QueryBuilder:
-		filters = {
-			"parenttype": self.parent_doctype,
-			"parentfield": self.fieldname,
-			"parent": ["in", parent_names],
-		}
 		return frappe.qb.get_query(
 			self.doctype,
-			fields=[*self.fields, "parent", "parentfield"],
-			filters=filters,
+			fields=self._query_fields,
+			filters={**self._base_filters, "parent": ["in", parent_names]},
 			order_by="idx asc",
 		)
 
+	def fetch_and_group(self, parent_names) -> dict[str, list]:
+		"""Fetch child rows of all parents in one query and group them by parent name, keeping idx order."""
+		grouped_rows = defaultdict(list)
+		for row in self.get_query(parent_names).run(as_dict=1):
+			if row.parentfield != self.fieldname:
+				continue
+
+			parent = str(row.parent)
+			if "parent" not in self.fields:
+				del row["parent"]
+			if "parentfield" not in self.fields:
+				del row["parentfield"]
+			grouped_rows[parent].append(row)
+
+		return grouped_rows
+
 
 def get_nested_set_hierarchy_result(doctype: str, name: str, hierarchy: str) -> list[str]:
-	"""Get matching nodes based on operator."""
-	table = frappe.qb.DocType(doctype)
-	try:
-		lft, rgt = frappe.qb.from_(table).select("lft", "rgt").where(table.name == name).run()[0]
-	except IndexError:
-		lft, rgt = None, None
+	"""Get matching nodes based on operator.
 
+	Nodes of a named node are kept in the database value cache for the rest of the request, which is
+	cleared along with the document cache of the doctype (e.g. when the tree is updated) and on
+	rollback. Changes made to `lft` / `rgt` with raw SQL are not tracked.
+	"""
 	if hierarchy in ("descendants of", "not descendants of", "descendants of (inclusive)"):
-		result = (
-			frappe.qb.from_(table)
-			.select(table.name)
-			.where(table.lft > lft)
-			.where(table.rgt < rgt)
-			.orderby(table.lft, order=Order.asc)
-			.run(pluck=True)
-		)
-		if hierarchy == "descendants of (inclusive)":
-			result += [name]
+		family = "descendants"
 	else:
-		# Get ancestor elements of a DocType with a tree structure
-		result = (
-			frappe.qb.from_(table)
-			.select(table.name)
-			.where(table.lft < lft)
-			.where(table.rgt > rgt)
-			.orderby(table.lft, order=Order.desc)
-			.run(pluck=True)
-		)
+		family = "ancestors"
+
+	if not isinstance(name, str):
+		nodes = _get_nested_set_nodes(doctype, name, family)
+	else:
+		doctype_cache = frappe.db.value_cache[doctype]
+		cache_key = ("nested_set", family, name)
+		if (nodes := doctype_cache.get(cache_key)) is None:
+			nodes = doctype_cache[cache_key] = _get_nested_set_nodes(doctype, name, family)
+			# nodes read in a transaction that is rolled back may belong to a tree that never existed
+			frappe.db.after_rollback.add(partial(doctype_cache.pop, cache_key, None))
+
+	result = list(nodes)
+	if hierarchy == "descendants of (inclusive)":
+		result.append(name)
 	return result
 
 
-@lru_cache(maxsize=1024)
+def _get_nested_set_nodes(doctype: str, name: str, family: str) -> tuple[str, ...]:
+	"""Get descendants (ordered by lft) or ancestors (closest first) of a node."""
+	query = _get_nested_set_query(doctype, family, frappe.db.db_type)
+	anchor = _get_doctype_table(doctype, "anchor")
+	return tuple(query.where(anchor.name == name).run(pluck=True))
+
+
+@lru_cache(maxsize=512)
+def _get_nested_set_query(doctype: str, family: str, db_type: str) -> QueryBuilder:
+	"""Build the nested-set lookup of a doctype once, the node is picked by the caller.
+
+	Query builders are immutable, so the cached query is never changed by `where`.
+	"""
+	table = _get_doctype_table(doctype)
+	# join the node itself so its bounds are read in the same query, no rows if it doesn't exist
+	anchor = _get_doctype_table(doctype, "anchor")
+
+	if family == "descendants":
+		# in a valid nested set, descendants are exactly the nodes with lft inside the anchor's bounds;
+		# ranging on lft alone lets the database use an index on `lft` if the doctype defines one
+		bounds = (table.lft > anchor.lft) & (table.lft < anchor.rgt)
+		order = Order.asc
+	else:
+		# Get ancestor elements of a DocType with a tree structure
+		bounds = (table.lft < anchor.lft) & (table.rgt > anchor.rgt)
+		order = Order.desc
+
+	return (
+		frappe.qb.from_(table)
+		.inner_join(anchor)
+		.on(bounds)
+		.select(table.name)
+		.orderby(table.lft, order=order)
+	)
+
+
+@lru_cache(maxsize=2048)
+def _get_doctype_table(doctype: str, alias: str | None = None) -> Table:
+	"""Return a shared pypika Table for the doctype.
+
+	Tables only carry the table name and alias and are copied by pypika on `as_`, so they are safe to
+	reuse across queries and sites.
+	"""
+	return frappe.qb.DocType(doctype, alias=alias)
+
+
+def _is_simple_field_name(name: str) -> bool:
+	"""Check if the name only has word characters, as used for filter, group by and order by fields."""
+	# plain ASCII identifiers, i.e. almost all field names, don't need the regex
+	if name.isascii() and name.isidentifier():
+		return True
+	return _matches_simple_field_pattern(name)
+
+
+@lru_cache(maxsize=4096)
+def _matches_simple_field_pattern(name: str) -> bool:
+	return SIMPLE_FIELD_PATTERN.fullmatch(name) is not None
+
+
+@lru_cache(maxsize=4096)
+def _is_valid_table_name(name: str) -> bool:
+	return TABLE_NAME_PATTERN.match(name) is not None
+
+
+def _strip_identifier_quotes(identifier: str) -> str | None:
+	"""Remove matching backticks or double quotes around an identifier, None if they are unbalanced."""
+	if identifier[:1] in ("`", '"'):
+		if len(identifier) < 2 or identifier[-1] != identifier[0]:
+			return None
+		return identifier[1:-1]
+	return identifier
+
+
+def _is_ascii_word(value: str) -> bool:
+	"""Check if the string is non-empty and only has ASCII letters, digits, underscores and spaces."""
+	return value.isascii() and value.replace(" ", "_").replace("_", "a").isalnum()
+
+
+def _parse_tab_notation(field: str) -> tuple[str, str] | None:
+	"""Split `tabDoc`.`field`, "tabDoc"."field" or tabDoc.field into doctype and fieldname.
+
+	Plain ASCII names are handled with string operations, anything else is left to `TAB_NOTATION_PATTERN`.
+	"""
+	start = 1 if field[:1] in ("`", '"') else 0
+	if not field.startswith("tab", start):
+		return None
+
+	doctype, dot, fieldname = field[start + 3 :].partition(".")
+	if dot:
+		if doctype[-1:] in ("`", '"'):
+			doctype = doctype[:-1]
+		if fieldname[:1] in ("`", '"'):
+			fieldname = fieldname[1:-1] if len(fieldname) > 1 and fieldname[-1] == fieldname[0] else ""
+		if _is_ascii_word(doctype) and _is_ascii_word(fieldname):
+			return doctype, fieldname
+
+	if match := TAB_NOTATION_PATTERN.match(field):
+		return match.group(1), match.group(3)
+
+
+def _parse_field_name(field_part: str) -> tuple[str | None, str] | None:
+	"""Split a (optionally table-qualified and quoted) field into its table and field name.
+
+	Plain ASCII names are handled with string operations, anything else is left to `FIELD_PARSE_REGEX`.
+	"""
+	table_part, dot, field_name = field_part.partition(".")
+	if not dot:
+		table_part, field_name = None, table_part
+
+	table_name = None
+	if table_part is not None:
+		table_name = _strip_identifier_quotes(table_part)
+		if not (
+			table_name
+			and len(table_name) > 3
+			and table_name.startswith("tab")
+			and table_name.isascii()
+			and table_name[3:].replace(" ", "_").replace("-", "_").isidentifier()
+		):
+			table_name = None
+
+	field_name = _strip_identifier_quotes(field_name)
+	if (
+		field_name
+		and field_name.isascii()
+		and field_name.isidentifier()
+		and (table_name is not None or table_part is None)
+	):
+		return table_name, field_name
+
+	if match := FIELD_PARSE_REGEX.match(field_part):
+		# Groups: 1: table_quote, 2: table_name_with_tab, 3: field_quote, 4: field_name
+		return match.group(2), match.group(4)
+
+
+@lru_cache(maxsize=4096)
 def _validate_select_field(field: str):
 	"""Validate a field string intended for use in a SELECT clause."""
 	if field == "*":
@@ -1294,6 +1558,10 @@ def _validate_select_field(field: str):
 	if field.isdigit():
 		return
 
+	# plain column names are the common case and don't need the regex
+	if field.isascii() and field.isidentifier():
+		return
+
 	if ALLOWED_FIELD_PATTERN.match(field):
 		return
 
@@ -1305,17 +1573,97 @@ def _validate_select_field(field: str):
 	)
 
 
-@lru_cache(maxsize=1024)
-def _sanitize_field(field: str, is_mariadb):
-	"""Validate and sanitize a field string for SELECT clause by stripping comments."""
+def _strip_sql_comments(sql: str) -> str:
+	"""Remove `--` and `/* */` comments from a SQL snippet, leaving quoted identifiers and strings intact."""
+	if "--" not in sql and "/*" not in sql:
+		return sql
+
+	parts = []
+	quote = None
+	start = idx = 0
+	length = len(sql)
+	while idx < length:
+		char = sql[idx]
+		if quote:
+			if char == quote:
+				quote = None
+		elif char in "`'\"":
+			quote = char
+		elif char == "-" and sql.startswith("--", idx):
+			parts.append(sql[start:idx])
+			# line comments run up to the newline, which is kept
+			idx = sql.find("\n", idx)
+			if idx == -1:
+				start = length
+				break
+			start = idx
+			continue
+		elif char == "/" and sql.startswith("/*", idx):
+			# replace block comments with a space so that the tokens around them are not glued together
+			parts.append(sql[start:idx])
+			parts.append(" ")
+			end = sql.find("*/", idx + 2)
+			start = idx = length if end == -1 else end + 2
+			continue
+		idx += 1
+
+	parts.append(sql[start:])
+	return "".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def _sanitize_field(field: str) -> str:
+	"""Validate and sanitize a field string for SELECT clause by stripping comments.
+
+	MariaDB's `#` comments need no handling, validation already rejects fields containing `#`.
+	"""
 	_validate_select_field(field)
+	return _strip_sql_comments(field).strip()
+
 
-	stripped_field = sqlparse.format(field, strip_comments=True, keyword_case="lower")
+def _split_fields(fields: str) -> list[str]:
+	"""Split a field string on commas outside of parentheses, dropping empty parts."""
+	if "(" not in fields:
+		parts = fields.split(",")
+	else:
+		parts = []
+		depth = start = 0
+		for idx, char in enumerate(fields):
+			if char == "(":
+				depth += 1
+			elif char == ")":
+				depth -= 1
+			elif char == "," and depth <= 0:
+				parts.append(fields[start:idx])
+				start = idx + 1
+		parts.append(fields[start:])
+
+	return [field for part in parts if (field := part.strip())]
+
+
+@lru_cache(maxsize=2048)
+def _sanitize_fields(fields: str | tuple[str, ...]) -> tuple[str, ...]:
+	"""Split comma-separated fields and sanitize each of them for the SELECT clause.
+
+	A single string is always split, items of a tuple are only split if they contain a comma.
+	Empty results are dropped.
+	"""
+	if isinstance(fields, str):
+		field_list = _split_fields(fields)
+	else:
+		field_list = []
+		for item in fields:
+			if "," in item:
+				field_list.extend(_split_fields(item))
+			else:
+				field_list.append(item.strip())
 
-	if is_mariadb:
-		stripped_field = MARIADB_SPECIFIC_COMMENT.sub("", stripped_field)
+	sanitized_fields = []
+	for field in field_list:
+		if sanitized_field := _sanitize_field(field).strip():
+			sanitized_fields.append(sanitized_field)
 
-	return stripped_field.strip()
+	return tuple(sanitized_fields)
 
 
 class RawCriterion(Term):
@@ -1325,6 +1673,8 @@ class RawCriterion(Term):
 		frappe.qb.from_("DocType").where(RawCriterion("name like 'a%'"))
 	"""
 
+	__slots__ = ("sql_string",)
+
 	def __init__(self, sql_string: str):
 		self.sql_string = sql_string
 		super().__init__()
@@ -1343,16 +1693,40 @@ class RawCriterion(Term):
 
 
 class CombinedRawCriterion(RawCriterion):
+	__slots__ = ("left", "operator", "right")
+
 	def __init__(self, left, right, operator):
+		# plain values are wrapped once here so that rendering doesn't have to check each side every time
+		if not hasattr(left, "get_sql"):
+			left = RawCriterion(str(left))
+		if not hasattr(right, "get_sql"):
+			right = RawCriterion(str(right))
+
 		self.left = left
 		self.right = right
 		self.operator = operator
-		super(RawCriterion, self).__init__()
+		# raw SQL renders the same regardless of query options, so it only has to be built once;
+		# pypika terms depend on the options (quote char, namespace) and are rendered on every call
+		sql_string = None
+		if (
+			isinstance(left, RawCriterion)
+			and isinstance(right, RawCriterion)
+			and left.sql_string is not None
+			and right.sql_string is not None
+		):
+			sql_string = f"({left.sql_string}) {operator} ({right.sql_string})"
+		super().__init__(sql_string)
 
 	def get_sql(self, **kwargs: Any) -> str:
-		left_sql = self.left.get_sql(**kwargs) if hasattr(self.left, "get_sql") else str(self.left)
-		right_sql = self.right.get_sql(**kwargs) if hasattr(self.right, "get_sql") else str(self.right)
-		return f"({left_sql}) {self.operator} ({right_sql})"
+		if self.sql_string is not None:
+			return self.sql_string
+
+		return f"({self.left.get_sql(**kwargs)}) {self.operator} ({self.right.get_sql(**kwargs)})"
+
+	def __invert__(self):
+		if self.sql_string is None:
+			return Not(Bracket(self))
+		return super().__invert__()
 
 
 class SQLFunctionParser:
@@ -1407,7 +1781,7 @@ class SQLFunctionParser:
 				parsed_arg = self._parse_and_validate_argument(arg)
 				parsed_args.append(parsed_arg)
 			function_call = func_class(*parsed_args)
-		elif isinstance(function_args, (int | float)):
+		elif isinstance(function_args, NUMBER_TYPES):
 			function_call = func_class(function_args)
 		elif function_args is None:
 			try:
@@ -1432,7 +1806,7 @@ class SQLFunctionParser:
 
 	def _parse_and_validate_argument(self, arg):
 		"""Parse and validate a single function argument against SQL injection."""
-		if isinstance(arg, (int | float)):
+		if isinstance(arg, NUMBER_TYPES):
 			return arg
 		elif isinstance(arg, str):
 			return self._validate_string_argument(arg)
@@ -1473,9 +1847,7 @@ class SQLFunctionParser:
 
 	def _is_string_literal(self, arg: str) -> bool:
 		"""Check if argument is a properly quoted string literal."""
-		return (arg.startswith("'") and arg.endswith("'") and len(arg) >= 2) or (
-			arg.startswith('"') and arg.endswith('"') and len(arg) >= 2
-		)
+		return len(arg) >= 2 and arg[0] in ("'", '"') and arg[-1] == arg[0]
 
 	def _validate_string_literal(self, literal: str):
 		"""Validate a string literal for SQL injection attacks."""
@@ -1497,35 +1869,20 @@ class SQLFunctionParser:
 				)
 
 		# Reject dangerous SQL keywords and patterns
-		dangerous_patterns = [
-			# SQL injection keywords
-			r"\b(?:union|select|insert|update|delete|drop|create|alter|exec|execute)\b",
-			# Comment patterns
-			r"--",
-			r"/\*",
-			r"\*/",
-			# Semicolon (statement terminator)
-			r";",
-			# Backslash escape sequences that could be dangerous
-			r"\\x[0-9a-fA-F]{2}",  # Hex escape sequences
-			r"\\[0-7]{1,3}",  # Octal escape sequences
-		]
-
-		content_lower = content.lower()
-		for pattern in dangerous_patterns:
-			if re.search(pattern, content_lower, re.IGNORECASE):
-				frappe.throw(
-					_("Potentially dangerous content in string literal: {0}").format(literal),
-					frappe.ValidationError,
-				)
+		# the pattern ignores case, no need to lowercase the content first
+		if DANGEROUS_LITERAL_PATTERN.search(content):
+			frappe.throw(
+				_("Potentially dangerous content in string literal: {0}").format(literal),
+				frappe.ValidationError,
+			)
 
 		# Return just the content without quotes - pypika will handle proper escaping
 		return content
 
 	def _is_valid_field_name(self, name: str) -> bool:
 		"""Check if a string is a valid field name."""
-		# Field names should only contain alphanumeric characters and underscores
-		return re.fullmatch(r"[a-zA-Z_][a-zA-Z0-9_]*", name) is not None
+		# Field names should only contain alphanumeric characters and underscores, not starting with a digit
+		return name.isascii() and name.isidentifier()
 
 	def _validate_alias(self, alias: str):
 		"""Validate alias name for SQL injection."""
@@ -1544,66 +1901,7 @@ class SQLFunctionParser:
 			)
 
 		# Check for SQL keywords that shouldn't be used as aliases
-		sql_keywords = {
-			"select",
-			"from",
-			"where",
-			"join",
-			"inner",
-			"left",
-			"right",
-			"outer",
-			"union",
-			"group",
-			"order",
-			"by",
-			"having",
-			"limit",
-			"offset",
-			"insert",
-			"update",
-			"delete",
-			"create",
-			"drop",
-			"alter",
-			"table",
-			"index",
-			"view",
-			"database",
-			"schema",
-			"grant",
-			"revoke",
-			"commit",
-			"rollback",
-			"transaction",
-			"begin",
-			"end",
-			"if",
-			"else",
-			"case",
-			"when",
-			"then",
-			"null",
-			"not",
-			"and",
-			"or",
-			"in",
-			"exists",
-			"between",
-			"like",
-			"is",
-			"as",
-			"on",
-			"using",
-			"distinct",
-			"all",
-			"any",
-			"some",
-			"true",
-			"false",
-		}
-
-		if alias.lower() in sql_keywords:
+		if alias.lower() in ALIAS_RESERVED_KEYWORDS:
 			frappe.throw(
 				_("Alias cannot be a SQL keyword: {0}").format(alias),
 				frappe.ValidationError,
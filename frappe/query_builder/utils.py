@@ -95,16 +95,10 @@ def execute_child_queries(queries, result):
 		return
 	parent_names = [d.name for d in result]
 	for child_query in queries:
-		data = child_query.get_query(parent_names).run(as_dict=1)
+		grouped_rows = child_query.fetch_and_group(parent_names)
+		# a parent listed more than once gets the same child rows, each time in a list of its own
 		for row in result:
-			row[child_query.fieldname] = []
-			for d in data:
-				if str(d.parent) == str(row.name) and d.parentfield == child_query.fieldname:
-					if "parent" not in child_query.fields:
-						del d["parent"]
-					if "parentfield" not in child_query.fields:
-						del d["parentfield"]
-					row[child_query.fieldname].append(d)
+			row[child_query.fieldname] = list(grouped_rows.get(str(row.name), ()))
 
 
 def prepare_query(query):
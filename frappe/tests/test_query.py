@@ -1,10 +1,31 @@
 import itertools
+from unittest.mock import patch
 
 import frappe
 from frappe.core.doctype.doctype.test_doctype import new_doctype
+from frappe.database import query as query_module
+from frappe.database.query import (
+	ALLOWED_FIELD_PATTERN,
+	FIELD_PARSE_REGEX,
+	SIMPLE_FIELD_PATTERN,
+	TAB_NOTATION_PATTERN,
+	ChildQuery,
+	ChildTableField,
+	CombinedRawCriterion,
+	DynamicTableField,
+	RawCriterion,
+	_is_simple_field_name,
+	_parse_field_name,
+	_parse_tab_notation,
+	_sanitize_fields,
+	_strip_sql_comments,
+	_validate_select_field,
+	get_nested_set_hierarchy_result,
+)
 from frappe.permissions import add_permission, update_permission_property
 from frappe.query_builder import Field
 from frappe.query_builder.functions import Abs, Count, Ifnull, Max, Now, Timestamp
+from frappe.query_builder.utils import execute_child_queries
 from frappe.tests import IntegrationTestCase
 from frappe.tests.classes.context_managers import enable_safe_exec
 from frappe.tests.test_db_query import (
@@ -141,6 +162,14 @@ class TestQuery(IntegrationTestCase):
 			frappe.qb.from_(user_doctype).select(user_doctype.email).get_sql(),
 		)
 
+	def test_query_immutability_restored(self):
+		"""Queries are built in place but must be returned as immutable builders."""
+		for kwargs in ({}, {"update": True}, {"into": True}, {"delete": True}):
+			filters = None if kwargs.get("into") else {"name": "Administrator"}
+			query = frappe.qb.get_query("User", filters=filters, **kwargs)
+			self.assertTrue(query.immutable, msg=f"Query built with {kwargs} returned mutable")
+			self.assertIsNot(query.where(Field("name") == "Guest"), query)
+
 	def test_field_validation_select(self):
 		"""Test validation for fields in SELECT clause."""
 
@@ -161,6 +190,8 @@ class TestQuery(IntegrationTestCase):
 			"`name` ; SELECT * FROM secrets",
 			"name--comment",
 			"name /* comment */",
+			"name #comment",
+			"#name",
 			"name AS alias; --",
 			"invalid-field-name",
 			"table.invalid-field",
@@ -197,6 +228,107 @@ class TestQuery(IntegrationTestCase):
 			):
 				frappe.qb.get_query("User", fields=[field]).get_sql()
 
+	def test_field_name_parsing_matches_patterns(self):
+		"""The string based field name helpers must agree with the regexes they shortcut."""
+		fields = [
+			"name",
+			"_name",
+			"name1",
+			"1name",
+			"123",
+			"nåme",
+			"名前",
+			"`name`",
+			'"name"',
+			"`name",
+			"name`",
+			"`na me`",
+			"na me",
+			"tabUser.name",
+			"`tabUser`.`name`",
+			'"tabUser"."name"',
+			"`tabUser`.name",
+			"tabUser.`name`",
+			"`tabHas Role`.`role`",
+			"tabHas Role.role",
+			"`tabHas-Role`.role",
+			"`tabUser`.`na me`",
+			"tabUsér.name",
+			"tabUser.nåme",
+			"tab.name",
+			"User.name",
+			"`User`.`name`",
+			"name as alias",
+			".name",
+			"tabUser.",
+			"tabUser..name",
+			"",
+		]
+
+		for field in fields:
+			with self.subTest(field=field):
+				match = FIELD_PARSE_REGEX.match(field)
+				self.assertEqual(
+					_parse_field_name(field), (match.group(2), match.group(4)) if match else None
+				)
+				self.assertEqual(
+					_is_simple_field_name(field), SIMPLE_FIELD_PATTERN.fullmatch(field) is not None
+				)
+				if field.isdigit() or ALLOWED_FIELD_PATTERN.match(field):
+					_validate_select_field(field)
+				else:
+					self.assertRaises(frappe.PermissionError, _validate_select_field, field)
+
+		self.assertEqual(_parse_field_name("`tabHas Role`.`role`"), ("tabHas Role", "role"))
+		self.assertEqual(_parse_field_name("nåme"), (None, "nåme"))
+		self.assertIsNone(_parse_field_name("User.name"))
+		self.assertFalse(_is_simple_field_name("na me"))
+		self.assertTrue(_is_simple_field_name("nåme"))
+
+	def test_tab_notation_parsing(self):
+		fields = [
+			"`tabX`.`y`",
+			"tabX.y",
+			'"tabX"."y"',
+			"`tabX`.y",
+			"tabX.`y`",
+			"`tabNote Seen By`.`user`",
+			"tabX Y.y",
+			"tabX.y z",
+			"tabNöte.y",
+			"`tabX`.`y",
+			"X.y",
+			"tabX.y.z",
+			# missing dot
+			"tabX",
+			"`tabX`",
+			# empty table or field part
+			"tab.y",
+			"`tab`.`y`",
+			"tabX.",
+			"`tabX`.``",
+		]
+
+		for field in fields:
+			with self.subTest(field=field):
+				match = TAB_NOTATION_PATTERN.match(field)
+				self.assertEqual(
+					_parse_tab_notation(field), (match.group(1), match.group(3)) if match else None
+				)
+
+		self.assertEqual(_parse_tab_notation("`tabX`.`y`"), ("X", "y"))
+		self.assertEqual(_parse_tab_notation("tabX.y"), ("X", "y"))
+		self.assertIsNone(_parse_tab_notation("tabX"))
+		self.assertIsNone(_parse_tab_notation("tab.y"))
+		self.assertIsNone(_parse_tab_notation("tabX."))
+
+		child_field = DynamicTableField.parse("`tabNote Seen By`.`user`", "Note")
+		self.assertIsInstance(child_field, ChildTableField)
+		self.assertEqual((child_field.doctype, child_field.fieldname), ("Note Seen By", "user"))
+		# fields of the main doctype and fields without a dot are left to the standard field parser
+		self.assertIsNone(DynamicTableField.parse("`tabNote`.`title`", "Note"))
+		self.assertIsNone(DynamicTableField.parse("title", "Note"))
+
 	def test_field_validation_filters(self):
 		"""Test validation for fields used in filters (WHERE clause)."""
 		valid_fields = ["name", "creation", "language.name"]
@@ -627,6 +759,55 @@ class TestQuery(IntegrationTestCase):
 	# 		"email", frappe.qb.get_query("User", fields=["name", "#email"], filters={}).get_sql()
 	# 	)
 
+	def test_strip_sql_comments(self):
+		cases = {
+			"name": "name",
+			"name -- comment": "name ",
+			"name -- comment\nother": "name \nother",
+			"name/* comment */other": "name other",
+			"name /* multi\nline */ other": "name   other",
+			# comment markers inside quoted literals and identifiers are kept
+			"'a -- b' -- comment": "'a -- b' ",
+			"'a /* b */' /* comment */": "'a /* b */'  ",
+			'"a -- b" -- comment': '"a -- b" ',
+			'"a /* b */"': '"a /* b */"',
+			"`a -- b` -- comment": "`a -- b` ",
+			"`tab/*x*/`.name": "`tab/*x*/`.name",
+			# unterminated comments run to the end, unterminated quotes keep the rest as is
+			"name /* comment": "name  ",
+			"name --": "name ",
+			"'name -- comment": "'name -- comment",
+			"`name /* comment */": "`name /* comment */",
+		}
+		for sql, expected in cases.items():
+			with self.subTest(sql=sql):
+				self.assertEqual(_strip_sql_comments(sql), expected)
+
+	def test_raw_criterion_combinations(self):
+		raw_a = RawCriterion("a = 1")
+		raw_b = RawCriterion("b = 2")
+		criterion = Field("title") == "x"
+
+		self.assertEqual((raw_a & raw_b).get_sql(), "(a = 1) AND (b = 2)")
+		self.assertEqual((raw_a | raw_b).get_sql(), "(a = 1) OR (b = 2)")
+		self.assertEqual((~(raw_a & raw_b)).get_sql(), "NOT ((a = 1) AND (b = 2))")
+		self.assertEqual(((raw_a & raw_b) | raw_a).get_sql(), "((a = 1) AND (b = 2)) OR (a = 1)")
+
+		# pypika criteria are rendered with the options of the query
+		self.assertEqual((raw_a & criterion).get_sql(quote_char="`"), "(a = 1) AND (`title`='x')")
+		self.assertEqual((raw_a | criterion).get_sql(quote_char="`"), "(a = 1) OR (`title`='x')")
+		self.assertEqual((raw_a | criterion).get_sql(quote_char=None), "(a = 1) OR (title='x')")
+		self.assertEqual((~(raw_a | criterion)).get_sql(quote_char="`"), "NOT ((a = 1) OR (`title`='x'))")
+		self.assertEqual(
+			((raw_a & criterion) | raw_b).get_sql(quote_char="`"), "((a = 1) AND (`title`='x')) OR (b = 2)"
+		)
+
+		# plain strings are taken as raw SQL
+		self.assertEqual(CombinedRawCriterion(raw_a, "c = 3", "AND").get_sql(), "(a = 1) AND (c = 3)")
+		self.assertEqual(CombinedRawCriterion("c = 3", raw_b, "OR").get_sql(), "(c = 3) OR (b = 2)")
+		self.assertEqual((raw_a | "c = 3").get_sql(), "(a = 1) OR (c = 3)")
+		self.assertEqual((~(raw_a & "c = 3")).get_sql(), "NOT ((a = 1) AND (c = 3))")
+
 	def test_nestedset(self):
 		frappe.db.sql("delete from `tabDocType` where `name` = 'Test Tree DocType'")
 		frappe.db.sql_ddl("drop table if exists `tabTest Tree DocType`")
@@ -685,6 +866,57 @@ class TestQuery(IntegrationTestCase):
 			),
 		)
 
+		# nodes are looked up once per request, names that are not strings are never cached
+		frappe.db.value_cache.pop("Test Tree DocType", None)
+		with patch.object(
+			query_module, "_get_nested_set_nodes", wraps=query_module._get_nested_set_nodes
+		) as get_nodes:
+			for hierarchy in ("descendants of", "not descendants of", "descendants of (inclusive)"):
+				get_nested_set_hierarchy_result("Test Tree DocType", "Parent 1", hierarchy)
+			self.assertEqual(get_nodes.call_count, 1)
+
+		with patch.object(query_module, "_get_nested_set_nodes", return_value=()) as get_nodes:
+			for _ in range(2):
+				get_nested_set_hierarchy_result("Test Tree DocType", ["Parent 1"], "descendants of")
+			self.assertEqual(get_nodes.call_count, 2)
+
+		# changing the tree drops the cached nodes
+		frappe.get_doc(
+			doctype="Test Tree DocType",
+			some_fieldname="Child 4",
+			parent_test_tree_doctype="Parent 1",
+			is_group=0,
+		).insert()
+		self.assertCountEqual(
+			get_nested_set_hierarchy_result("Test Tree DocType", "Parent 1", "descendants of"),
+			get_descendants_of("Test Tree DocType", "Parent 1"),
+		)
+		self.assertIn("Child 4", get_descendants_of("Test Tree DocType", "Parent 1"))
+
+		get_nested_set_hierarchy_result("Test Tree DocType", "Child 1", "ancestors of")
+		child_1 = frappe.get_doc("Test Tree DocType", "Child 1")
+		child_1.parent_test_tree_doctype = "Parent 2"
+		child_1.save()
+
+		descendants_result = frappe.qb.get_query(
+			"Test Tree DocType",
+			fields=["name"],
+			filters={"name": ("descendants of", "Parent 1")},
+		).run(pluck=True)
+		self.assertCountEqual(descendants_result, ["Child 2", "Child 4"])
+		self.assertCountEqual(
+			get_nested_set_hierarchy_result("Test Tree DocType", "Parent 2", "descendants of"),
+			["Child 1", "Child 3"],
+		)
+		self.assertListEqual(
+			get_nested_set_hierarchy_result("Test Tree DocType", "Child 1", "ancestors of"),
+			get_ancestors_of("Test Tree DocType", "Child 1"),
+		)
+		self.assertListEqual(
+			get_nested_set_hierarchy_result("Test Tree DocType", "Child 1", "ancestors of"),
+			["Parent 2", "Root Node"],
+		)
+
 		frappe.db.sql("delete from `tabDocType` where `name` = 'Test Tree DocType'")
 		frappe.db.sql_ddl("drop table if exists `tabTest Tree DocType`")
 
@@ -720,6 +952,52 @@ class TestQuery(IntegrationTestCase):
 		note1.delete()
 		note2.delete()
 
+	def test_child_query_grouping(self):
+		note1 = frappe.get_doc(
+			doctype="Note", title="Note 1", seen_by=[{"user": "Administrator"}, {"user": "Guest"}]
+		).insert()
+		note2 = frappe.get_doc(
+			doctype="Note", title="Note 2", seen_by=[{"user": "Guest"}, {"user": "Administrator"}]
+		).insert()
+
+		result = frappe.qb.get_query(
+			"Note",
+			filters={"name": ["in", [note1.name, note2.name]]},
+			fields=["name", {"seen_by": ["user", "idx"]}],
+			order_by="title asc",
+		).run(as_dict=1)
+
+		# rows are grouped under their own parent in idx order, parent columns aren't returned unless asked for
+		self.assertEqual(
+			[row.seen_by for row in result],
+			[
+				[{"user": "Administrator", "idx": 1}, {"user": "Guest", "idx": 2}],
+				[{"user": "Guest", "idx": 1}, {"user": "Administrator", "idx": 2}],
+			],
+		)
+
+		result = frappe.qb.get_query(
+			"Note",
+			filters={"name": ["in", [note1.name, note2.name]]},
+			fields=["name", {"seen_by": ["user", "parent"]}],
+			order_by="title asc",
+		).run(as_dict=1)
+
+		for row, note in zip(result, (note1, note2), strict=True):
+			self.assertEqual([child.parent for child in row.seen_by], [note.name, note.name])
+			self.assertEqual([set(child) for child in row.seen_by], [{"user", "parent"}] * 2)
+
+		# a parent listed twice gets its child rows both times
+		result = [frappe._dict(name=note1.name), frappe._dict(name=note2.name), frappe._dict(name=note1.name)]
+		execute_child_queries([ChildQuery("seen_by", ["user"], "Note")], result)
+		self.assertEqual(result[0].seen_by, [{"user": "Administrator"}, {"user": "Guest"}])
+		self.assertEqual(result[1].seen_by, [{"user": "Guest"}, {"user": "Administrator"}])
+		self.assertEqual(result[2].seen_by, result[0].seen_by)
+		self.assertIsNot(result[2].seen_by, result[0].seen_by)
+
+		note1.delete()
+		note2.delete()
+
 	def test_build_match_conditions(self):
 		from frappe.permissions import add_user_permission, clear_user_permissions_for_doctype
 
@@ -760,6 +1038,29 @@ class TestQuery(IntegrationTestCase):
 
 		frappe.set_user("Administrator")
 
+	def test_permitted_fields_fetched_once_per_doctype(self):
+		"""Field permissions are resolved for the query's user, once per doctype."""
+		frappe.set_user("Guest")
+		try:
+			with patch.object(
+				query_module, "get_permitted_fields", wraps=query_module.get_permitted_fields
+			) as get_permitted_fields:
+				frappe.qb.get_query(
+					"Note",
+					fields=["name", "title"],
+					filters={"title": "Test Note"},
+					order_by="title asc",
+					group_by="name",
+					ignore_permissions=False,
+					user="Administrator",
+				).get_sql()
+		finally:
+			frappe.set_user("Administrator")
+
+		self.assertEqual(get_permitted_fields.call_count, 1)
+		self.assertEqual(get_permitted_fields.call_args.kwargs["doctype"], "Note")
+		self.assertEqual(get_permitted_fields.call_args.kwargs["user"], "Administrator")
+
 	def test_permlevel_fields(self):
 		"""Test permission level check when querying fields"""
 		with setup_patched_blog_post(), setup_test_user(set_user=True):
@@ -1507,6 +1808,25 @@ class TestQuery(IntegrationTestCase):
 			frappe.qb.get_query("User", group_by="`name`, `email`").get_sql()
 		self.assertIn("cannot contain backticks", str(cm.exception))
 
+	def test_field_case_is_kept(self):
+		"""Keywords in fields and aliases keep the case they were written in."""
+		self.assertEqual(
+			_sanitize_fields("name as Year, creation as Date"), ("name as Year", "creation as Date")
+		)
+
+		sql = frappe.qb.get_query("User", fields=["name as Year", "creation as Date"]).get_sql()
+		self.assertIn(
+			"`name` `Year`,`creation` `Date`".replace("`", '"' if frappe.db.db_type == "postgres" else "`"),
+			sql,
+		)
+
+		sql = frappe.qb.get_query(
+			"User", fields=[{"COUNT": "name", "as": "Year"}], group_by="user_type"
+		).get_sql()
+		self.assertIn(
+			"COUNT(`name`) `Year`".replace("`", '"' if frappe.db.db_type == "postgres" else "`"), sql
+		)
+
 	def test_sql_functions_in_fields(self):
 		"""Test SQL function support in fields with various syntaxes."""
 